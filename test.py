@@ -1,25 +1,20 @@
 import os
+import sys
+import json
+import pickle
+import time
 import feedparser
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize, sent_tokenize
-
-# --- Download NLTK data (only needs to be done once) ---
-try:
-    stopwords.words('english')
-except LookupError:
-    print("Downloading NLTK stopwords...")
-    nltk.download('stopwords')
-    nltk.download('punkt')
-# ---------------------------------------------------------
 
 # ---------- CONFIGURATION ----------
 FEEDS = [
@@ -34,6 +29,12 @@ FEEDS = [
 
 COMPANY_BLOG_URL = "https://www.abacusdigital.net/blogs"
 
+# Feed validators (ETag / Last-Modified) and parsed articles, reused when a feed answers 304
+FEED_CACHE_PATH = ".feed_cache.pkl"
+# Keywords scraped from your blog are reused for a day before the blog is scraped again
+BLOG_KEYWORDS_CACHE_PATH = ".blog_keywords_cache.json"
+BLOG_KEYWORDS_CACHE_TTL = 24 * 60 * 60 # seconds
+
 NUM_ARTICLES_TO_SCAN = 50
 NUM_SUGGESTIONS = 15
 
@@ -44,6 +45,26 @@ RECIPIENT_EMAIL = os.getenv("RECIPIENT_EMAIL")
 SMTP_SERVER = "smtp.gmail.com"
 SMTP_PORT = 587
 
+# NLTK's English stopword list, frozen here so the corpus doesn't need to be downloaded at runtime
+NLTK_STOPWORDS = frozenset([
+    "i","me","my","myself","we","our","ours","ourselves","you","you're","you've",
+    "you'll","you'd","your","yours","yourself","yourselves","he","him","his","himself",
+    "she","she's","her","hers","herself","it","it's","its","itself","they","them",
+    "their","theirs","themselves","what","which","who","whom","this","that","that'll",
+    "these","those","am","is","are","was","were","be","been","being","have","has","had",
+    "having","do","does","did","doing","a","an","the","and","but","if","or","because",
+    "as","until","while","of","at","by","for","with","about","against","between","into",
+    "through","during","before","after","above","below","to","from","up","down","in",
+    "out","on","off","over","under","again","further","then","once","here","there",
+    "when","where","why","how","all","any","both","each","few","more","most","other",
+    "some","such","no","nor","not","only","own","same","so","than","too","very","s","t",
+    "can","will","just","don","don't","should","should've","now","d","ll","m","o","re",
+    "ve","y","ain","aren","aren't","couldn","couldn't","didn","didn't","doesn","doesn't",
+    "hadn","hadn't","hasn","hasn't","haven","haven't","isn","isn't","ma","mightn",
+    "mightn't","mustn","mustn't","needn","needn't","shan","shan't","shouldn","shouldn't",
+    "wasn","wasn't","weren","weren't","won","won't","wouldn","wouldn't"
+])
+
 EXTRA_STOPWORDS = set([
     "with","from","that","this","have","will","your","their","about","into","more",
     "been","also","over","some","what","when","where","which","using","than","then",
@@ -51,69 +72,219 @@ EXTRA_STOPWORDS = set([
     "http","https","www","com","blog","like","get","make","use","new","year",
     "need","know","see","top","best","guide","how","why"
 ])
-STOPWORDS = set(stopwords.words('english')).union(EXTRA_STOPWORDS)
+STOPWORDS = NLTK_STOPWORDS | EXTRA_STOPWORDS
+
+# Titles containing one of these already read like a blog topic
+QUESTION_STARTERS = ["How to", "Why", "What is", "The Ultimate Guide to", "A Beginner's Guide to"]
+LIST_STARTERS = ["Ways to", "Steps to", "Effective Strategies for", "Examples of"]
 # -------------------------------------
 
+# Compiled once at import; clean_text runs for every article and blog snippet
+_WORD_RE = re.compile(r'\b[a-zA-Z]{3,}\b')
+# Cheap sentence splitter; we only look at the first two sentences of a summary
+_SENT_RE = re.compile(r'(?<=[.!?])\s+(?=[A-Z])')
+# Lowercased once at import; titles are lowercased once per article and checked with plain substring tests
+_STARTERS_LOWER = tuple(starter.lower() for starter in QUESTION_STARTERS + LIST_STARTERS)
+# Maps ASCII punctuation/whitespace to spaces so plain str.split() can tokenize ASCII text
+_NON_WORD_TABLE = str.maketrans({chr(c): " " for c in range(128) if not (chr(c).isalnum() or chr(c) == "_")})
+
+# Shared HTTP session so the blog scrape and all feed downloads reuse keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=Retry(total=2, backoff_factor=0.2)))
+SESSION.headers["Accept-Encoding"] = "gzip, deflate"
+
 def clean_text(text):
-    return re.findall(r'\b[a-zA-Z]{3,}\b', text.lower())
+    text = text.lower()
+    if not text.isascii():
+        return _WORD_RE.findall(text)
+    # Same tokens as _WORD_RE, but a table lookup + split is about twice as fast
+    return [w for w in text.translate(_NON_WORD_TABLE).split() if len(w) >= 3 and w.isalpha()]
+
+def load_blog_keywords_cache(url):
+    """Returns the cached keywords for url if they were scraped within the TTL, else None."""
+    try:
+        if time.time() - os.path.getmtime(BLOG_KEYWORDS_CACHE_PATH) >= BLOG_KEYWORDS_CACHE_TTL:
+            return None
+        with open(BLOG_KEYWORDS_CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("url") != url:
+        return None
+    return set(map(sys.intern, cache.get("keywords", [])))
+
+def save_blog_keywords_cache(url, keywords):
+    """Saves scraped blog keywords; empty results aren't cached so the next run retries."""
+    if not keywords:
+        return
+    try:
+        with open(BLOG_KEYWORDS_CACHE_PATH, "w") as f:
+            json.dump({"url": url, "keywords": sorted(keywords)}, f)
+    except OSError as e:
+        print(f"Could not save blog keywords cache: {e}")
 
 def get_existing_blog_keywords(url):
     """Optional weighting: keywords from your blog (not mandatory)."""
+    cached = load_blog_keywords_cache(url)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(url, timeout=15)
+        response = SESSION.get(url, timeout=15)
         response.raise_for_status()
-        soup = BeautifulSoup(response.content, 'html.parser')
+        soup = BeautifulSoup(response.content, 'lxml')
         titles = [h2.get_text() for h2 in soup.select('h2.font-bold')]
         descriptions = [p.get_text() for p in soup.select('p.text-base')]
         full_text = " ".join(titles) + " ".join(descriptions)
         words = clean_text(full_text)
-        return set([w for w in words if w not in STOPWORDS])
+        keywords = set([sys.intern(w) for w in words if w not in STOPWORDS])
     except requests.exceptions.RequestException:
         return set()
 
+    save_blog_keywords_cache(url, keywords)
+    return keywords
+
+def load_feed_cache():
+    """Loads cached feed validators and articles from the previous run, if any."""
+    try:
+        with open(FEED_CACHE_PATH, "rb") as f:
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return {}
+
+def save_feed_cache(cache):
+    """Saves feed validators and articles so the next run can use conditional GETs."""
+    try:
+        with open(FEED_CACHE_PATH, "wb") as f:
+            pickle.dump(cache, f)
+    except OSError as e:
+        print(f"Could not save feed cache: {e}")
+
+def parse_feed_articles(body, headers=None):
+    """
+    Parses a raw RSS feed body into (unscored) article dicts.
+    headers are the HTTP response headers plus the final URL as content-location, which feedparser
+    needs to resolve relative links and to honour a charset sent only in Content-Type.
+    """
+    feed = feedparser.parse(body, response_headers=headers)
+    articles = []
+    default_now = datetime.now() # Used for entries without a publish date
+    for entry in feed.entries:
+        published_parsed = entry.get("published_parsed")
+        published_dt = default_now
+        if published_parsed:
+            try:
+                published_dt = datetime(*published_parsed[:6])
+            except (ValueError, TypeError):
+                pass # Out-of-range dates such as WordPress's 0000-00-00 keep the fallback
+
+        text = entry.title + " " + entry.get("summary", "")
+        # Unique keywords only: trending counts articles rather than repeats. Kept in first-seen order
+        # (not a set) so ties in the trending list come out the same on every run.
+        keywords = tuple(dict.fromkeys(w for w in clean_text(text) if w not in STOPWORDS))
+
+        articles.append({
+            "title": entry.title,
+            "link": entry.link,
+            "published": published_dt,
+            "summary": entry.get("summary", "No summary available."),
+            "keywords": keywords
+        })
+    return articles
+
+def fetch_feed(url, cached=None):
+    """
+    Downloads a single RSS feed, using a conditional GET when we have cached validators.
+    Returns the response (possibly a 304), or None if the request failed.
+    """
+    headers = {}
+    if cached:
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    try:
+        response = SESSION.get(url, headers=headers, timeout=15)
+        response.raise_for_status()
+        return response
+    except requests.exceptions.RequestException:
+        return None
+
+def score_articles(articles, company_keywords):
+    """Score: trending weight (keyword frequency) + overlap with company blog."""
+    scored = []
+    for article in articles:
+        # Intern keywords once here, whether they were just parsed or unpickled from the feed cache,
+        # so repeats share one object in the keyword sets and the trending Counter
+        keywords = tuple(map(sys.intern, article["keywords"]))
+        # With no company keywords there is nothing to overlap with, so skip the intersection
+        score = len(company_keywords.intersection(keywords)) if company_keywords else 0
+        scored.append(dict(article, keywords=keywords, score=score))
+    return scored
+
 def fetch_and_score_articles(feeds, company_keywords):
-    """Fetch RSS and score based on market trend + optional company relevance."""
+    """Fetch RSS feeds concurrently and score based on market trend + optional company relevance."""
+    cache = load_feed_cache()
+    new_cache = {}
+    fetched = set()
+    # Downloads are network-bound and run in threads. Each feed is parsed here as soon as its download
+    # finishes, so parsing overlaps the downloads that are still in flight. Parsing stays in-process:
+    # a worker pool's startup cost outweighed its parallelism for a handful of feeds.
+    with ThreadPoolExecutor(max_workers=max(len(feeds), 1)) as fetch_pool:
+        downloads = {fetch_pool.submit(fetch_feed, url, cache.get(url)): url for url in feeds}
+        for download in as_completed(downloads):
+            url = downloads[download]
+            response = download.result()
+            if response is None:
+                # Skip this feed, but keep what we had cached
+                if url in cache:
+                    new_cache[url] = cache[url]
+                continue
+
+            if response.status_code == 304 and url in cache:
+                new_cache[url] = cache[url]
+            else:
+                # feedparser only looks up lowercase header names. requests has already decoded the body,
+                # so don't let feedparser see Content-Encoding
+                headers = {k.lower(): v for k, v in response.headers.items() if k.lower() != "content-encoding"}
+                headers["content-location"] = response.url
+                try:
+                    feed_articles = parse_feed_articles(response.content, headers)
+                except Exception as e:
+                    # One feed failing to parse shouldn't stop the report; keep what we had cached
+                    print(f"Error parsing feed {url}: {e}")
+                    if url in cache:
+                        new_cache[url] = cache[url]
+                    continue
+                new_cache[url] = {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "articles": feed_articles
+                }
+            fetched.add(url)
+    save_feed_cache(new_cache)
+
     articles = []
     for url in feeds:
-        feed = feedparser.parse(url)
-        for entry in feed.entries:
-            try:
-                published_dt = datetime(*entry.published_parsed[:6])
-            except Exception:
-                published_dt = datetime.now()
-
-            text = entry.title + " " + entry.get("summary", "")
-            words = clean_text(text)
-            keywords = [w for w in words if w not in STOPWORDS]
-
-            # Score: trending weight (keyword frequency) + overlap with company blog
-            overlap_score = len(set(keywords).intersection(company_keywords)) if company_keywords else 0
-
-            articles.append({
-                "title": entry.title,
-                "link": entry.link,
-                "published": published_dt,
-                "summary": entry.get("summary", "No summary available."),
-                "keywords": keywords,
-                "score": overlap_score
-            })
+        if url in fetched:
+            articles.extend(score_articles(new_cache[url]["articles"], company_keywords))
     return sorted(articles, key=lambda x: (x["score"], x["published"]), reverse=True)
 
 def suggest_seo_topics(articles):
     ideas = []
-    question_starters = ["How to", "Why", "What is", "The Ultimate Guide to", "A Beginner's Guide to"]
-    list_starters = ["Ways to", "Steps to", "Effective Strategies for", "Examples of"]
 
     for article in articles[:NUM_ARTICLES_TO_SCAN]:
         clean_title = article['title']
 
         # Idea from title itself
-        if any(starter.lower() in clean_title.lower() for starter in question_starters + list_starters):
+        title_lc = clean_title.lower()
+        if any(starter in title_lc for starter in _STARTERS_LOWER):
             ideas.append((clean_title, article['link']))
 
         # Idea from summary sentences
         try:
-            sentences = sent_tokenize(article['summary'])
+            sentences = _SENT_RE.split(article['summary'], maxsplit=2)
             for sent in sentences[:2]:
                 if 8 < len(sent.split()) < 20:
                     idea = f"Why is {sent[0].lower() + sent[1:]} Important for Your Business?"
@@ -131,34 +302,34 @@ def suggest_seo_topics(articles):
 
     return unique_ideas[:NUM_SUGGESTIONS]
 
-def build_email_content(seo_topics, trending_keywords):
-    html = f"""
+def build_email_content(seo_topics, trending_keywords, now_str=None):
+    parts = [f"""
     <html>
     <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 700px; margin: auto; border: 1px solid #ddd; padding: 20px;">
     <h2 style="color: #1a73e8;">🚀 SEO Blog Topic Suggestions (Market Trends)</h2>
     <p>Here are SEO-friendly blog topics based on current industry content:</p>
-    """
+    """]
 
-    html += "<h3 style='border-bottom: 2px solid #1a73e8; padding-bottom: 5px;'>🎯 Suggested Blog Titles & Topics</h3><ul>"
+    parts.append("<h3 style='border-bottom: 2px solid #1a73e8; padding-bottom: 5px;'>🎯 Suggested Blog Titles & Topics</h3><ul>")
     for i, (t, link) in enumerate(seo_topics, 1):
-        html += f"""
+        parts.append(f"""
         <li style="margin-bottom: 15px;">
             <strong style="font-size: 1.1em;">{i}. {t}</strong><br>
             <a href="{link}" target="_blank" style="color:#1a73e8;">Read Source</a>
         </li>
-        """
-    html += "</ul>"
+        """)
+    parts.append("</ul>")
 
-    html += "<h3 style='border-bottom: 2px solid #1a73e8; padding-bottom: 5px;'>🔥 Trending Keywords</h3><p>"
-    html += ", ".join([f"<span style='background-color: #e8f0fe; padding: 3px 8px; border-radius: 5px; margin: 3px; display: inline-block;'>{word}</span>" for word, count in trending_keywords])
-    html += "</p>"
+    parts.append("<h3 style='border-bottom: 2px solid #1a73e8; padding-bottom: 5px;'>🔥 Trending Keywords</h3><p>")
+    parts.append(", ".join(f"<span style='background-color: #e8f0fe; padding: 3px 8px; border-radius: 5px; margin: 3px; display: inline-block;'>{word}</span>" for word, count in trending_keywords))
+    parts.append("</p>")
 
-    html += "<p style='margin-top:20px; font-size:12px; color:#888;'>Generated automatically on {}</p>".format(
-        datetime.now().strftime("%Y-%m-%d %H:%M")
-    )
+    if now_str is None:
+        now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    parts.append("<p style='margin-top:20px; font-size:12px; color:#888;'>Generated automatically on {}</p>".format(now_str))
 
-    html += "</body></html>"
-    return html
+    parts.append("</body></html>")
+    return "".join(parts)
 
 def send_email(subject, body_html):
     msg = MIMEMultipart("alternative")
@@ -190,15 +361,19 @@ def main():
     print("Generating SEO topic suggestions...")
     seo_topics = suggest_seo_topics(scored_articles)
     
-    all_keywords = [kw for article in scored_articles[:NUM_ARTICLES_TO_SCAN] for kw in article['keywords']]
-    trending_keywords = Counter(all_keywords).most_common(20)
+    keyword_counts = Counter()
+    for article in scored_articles[:NUM_ARTICLES_TO_SCAN]:
+        keyword_counts.update(article['keywords'])
+    trending_keywords = keyword_counts.most_common(20)
 
     if not seo_topics:
         print("No SEO topics generated. Try adjusting the feeds.")
         return
 
-    email_body = build_email_content(seo_topics, trending_keywords)
-    subject = f"SEO Blog Topics - {datetime.now().strftime('%Y-%m-%d')}"
+    # One timestamp for the whole report, so the subject date and the footer always agree
+    now_str = datetime.now().strftime("%Y-%m-%d %H:%M")
+    email_body = build_email_content(seo_topics, trending_keywords, now_str=now_str)
+    subject = f"SEO Blog Topics - {now_str[:10]}"
     
     send_email(subject, email_body)
 